@@ -6,6 +6,8 @@ from pandas import DataFrame
 from shiny import reactive
 from shiny.express import input, render, ui
 
+from app_data import RIN_CACHE, RIN_CACHE_PATH, SEARCH_INDEX, SEARCH_INDEX_PATH
+from modules import clamp_page, query_page, to_grid_frame
 from retrieve_documents import retrieve_documents
 
 from _version import __release__
@@ -19,6 +21,13 @@ LAST_THU = TODAY + relativedelta(weekday=TH(-1))
 # columns to show under Browse Data
 SHOW_COLUMNS = ["publication_date", "parent_agency_names", "title", "action", "url", "significant", "3f1_significant", ]
 
+# rows per page when filtering, sorting, and paging on the server
+PAGE_SIZES = ["25", "50", "100", "250"]
+
+# search results from the index shared by all sessions; the index and RIN cache are loaded once per process in app_data.py
+SEARCH_COLUMNS = ["publication_date", "agency_names", "title", "action", "html_url", ]
+search_index_updates = reactive.value(0)
+
 ui.page_opts(title="Retrieve FR Clips for the Regulation Digest", fillable=True)
 
 ui.input_date_range(
@@ -37,15 +46,48 @@ async def download():
 
 ui.input_action_button("view", "Browse Data", )
 
+ui.input_switch("server_side", "Filter and page on the server (faster for long date ranges)", value=True)
+
 
 with ui.card(full_screen=True):
+    with ui.panel_conditional("input.server_side"):
+        with ui.layout_columns():
+            ui.input_select("filter_column", "Filter column:", choices=SHOW_COLUMNS, selected="title")
+            ui.input_text("filter_value", "Contains:")
+            ui.input_select("sort_by", "Sort by:", choices=SHOW_COLUMNS, selected="publication_date")
+            ui.input_checkbox("sort_desc", "Descending", value=False)
+            ui.input_select("page_size", "Rows per page:", choices=PAGE_SIZES, selected="50")
+            ui.input_numeric("page", "Page:", value=1, min=1, step=1)
+        
+        @render.text
+        def page_summary():
+            _, total = get_page()
+            page_size = int(input.page_size())
+            start = (clamp_page(input.page() or 1, total, page_size) - 1) * page_size
+            return f"Showing rows {min(start + 1, total)}-{min(start + page_size, total)} of {total}."
+    
     @render.data_frame
-    @reactive.event(input.view)
     def table_of_rules():
-        df = get_data()
+        if input.server_side():
+            page, _ = get_page()
+            return render.DataGrid(page, width="100%")
+        df = get_viewed_data()
         return render.DataGrid(df.loc[:, [c for c in SHOW_COLUMNS if c in df.columns]], width="100%", filters=True)
 
 
+with ui.card(full_screen=True):
+    ui.input_text("search_query", "Search retrieved documents (use quotes for phrases):", width="100%")
+    
+    @render.data_frame
+    def search_results():
+        query = input.search_query()
+        if not query.strip():
+            return render.DataGrid(DataFrame(columns=SEARCH_COLUMNS), width="100%")
+        search_index_updates()  # re-run search after new documents are indexed
+        results = SEARCH_INDEX.search(query)
+        return render.DataGrid(DataFrame(results, columns=SEARCH_COLUMNS), width="100%")
+
+
 if __release__.get('version') is not None:
     ui.tags.footer(f"Version: {__release__.get('version', '')}")
 
@@ -55,10 +97,58 @@ if __release__.get('version') is not None:
 
 @reactive.calc
 def get_data():
-    results = retrieve_documents(*input.input_dates(), input_path=None)
+    results = retrieve_documents(*input.input_dates(), input_path=None, rin_cache=RIN_CACHE)
     if results is None:
         return DataFrame(columns=SHOW_COLUMNS)
     else:
         results = results.reset_index()
         results.loc[:, "url"] = [fr"https://www.federalregister.gov/d/{r}" for r in results["document_number"].to_list()]
         return results
+
+
+@reactive.calc
+@reactive.event(input.view)
+def get_viewed_data():
+    # only refresh the browsed data when the button is pressed
+    return get_data()
+
+
+@reactive.effect
+def index_viewed_data():
+    # add browsed documents to the search index and append only the changes to disk
+    if SEARCH_INDEX.add_documents(get_viewed_data().to_dict("records")) == 0:
+        return
+    try:
+        SEARCH_INDEX.save_changes(SEARCH_INDEX_PATH)
+    except OSError:  # keep the in-memory index if the data directory is read-only
+        pass
+    with reactive.isolate():
+        search_index_updates.set(search_index_updates() + 1)
+
+
+@reactive.effect
+def save_rin_cache():
+    # persist parsed RIN info after each browsed retrieval
+    get_viewed_data()
+    try:
+        RIN_CACHE.save(RIN_CACHE_PATH)
+    except OSError:  # keep the in-memory cache if the data directory is read-only
+        pass
+
+
+@reactive.calc
+def get_grid_data():
+    # columnar copy of the cached results; rebuilt only when the data changes
+    return to_grid_frame(get_viewed_data(), SHOW_COLUMNS)
+
+
+@reactive.calc
+def get_page():
+    return query_page(
+        get_grid_data(), 
+        filters={input.filter_column(): input.filter_value()}, 
+        sort_by=input.sort_by(), 
+        descending=input.sort_desc(), 
+        page=input.page() or 1, 
+        page_size=int(input.page_size()), 
+        )
@@ -0,0 +1,19 @@
+# data shared by every session of the web app
+# Shiny Express runs app.py once per session, so data loaded there would be loaded, held, and saved separately by each session;
+# this module is imported once per process instead
+
+import os
+from pathlib import Path
+
+from modules import RinCache, SearchIndex
+
+# app data is kept outside the package so it isn't bundled on deploy
+DATA_DIR = Path(os.environ.get("REGDIGEST_DATA_DIR", Path(__file__).parents[1] / "output"))
+
+# full-text index of every document browsed through the app
+SEARCH_INDEX_PATH = DATA_DIR / "search_index.json.gz"
+SEARCH_INDEX = SearchIndex.load(SEARCH_INDEX_PATH)
+
+# parsed RIN info reused across sessions and runs
+RIN_CACHE_PATH = DATA_DIR / "rin_cache.json"
+RIN_CACHE = RinCache.load(RIN_CACHE_PATH)
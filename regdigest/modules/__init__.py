@@ -5,15 +5,51 @@ Last revised: 2024-06-06
 """
 
 __all__ = [
+    "cassette", 
+    "files", 
     "filters", 
+    "grid", 
+    "merge", 
+    "pattern_performance", 
+    "rin_cache", 
+    "search_index", 
     "significant", 
+    "store", 
     ]
 
+from .cassette import (
+    Cassette, 
+    CassetteError, 
+    use_cassette, 
+    )
+
 from .filters import (
     filter_corrections, 
     filter_actions, 
     )
 
+from .grid import (
+    clamp_page, 
+    query_page, 
+    to_grid_frame, 
+    )
+
+from .merge import (
+    merge_results, 
+    )
+
+from .rin_cache import (
+    RinCache, 
+    )
+
+from .search_index import (
+    SearchIndex, 
+    )
+
 from .significant import (
     get_significant_info
     )
+
+from .store import (
+    DigestStore, 
+    )
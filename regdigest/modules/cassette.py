@@ -0,0 +1,175 @@
+# record and replay HTTP responses from a local cassette store
+# every request made through `requests` (including those inside fr_toolbelt) passes through `requests.Session.send`
+
+from contextlib import contextmanager
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from threading import Lock, local
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_MODES = ("replay", "record", "auto")
+
+# `requests.Session.send` is patched while any cassette is active and restored when the last one exits
+_PATCH_LOCK = Lock()
+_PATCH_COUNT = 0
+_SEND = requests.Session.send
+
+# cassettes active in each thread, innermost last
+_ACTIVE = local()
+
+
+class CassetteError(Exception):
+    pass
+
+
+def _normalize_url(url: str) -> str:
+    """Sort query parameters so equivalent requests map to the same cassette entry."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """Create a stable key for a prepared request from its method, normalized url, and body.
+
+    Args:
+        request (PreparedRequest): Request about to be sent.
+
+    Returns:
+        str: Hex digest identifying the request.
+    """
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    h = hashlib.sha1(f"{request.method} {_normalize_url(request.url)}".encode("utf-8"))
+    h.update(body)
+    return h.hexdigest()
+
+
+class Cassette:
+    """Local store of recorded HTTP responses.
+    Each response is saved as one gzip file (`<key>.gz`) with a JSON header line followed by the raw response body.
+
+    Args:
+        path (Path | str): Directory holding the cassette files.
+        mode (str, optional): "replay" serves only recorded responses, "record" always hits the network and saves the response,
+            "auto" replays when a recording exists and records otherwise. Defaults to "replay".
+    """
+    def __init__(self, path: Path | str, mode: str = "replay") -> None:
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Parameter 'mode' must be one of {CASSETTE_MODES}.")
+        self.path = Path(path)
+        self.mode = mode
+        self.hits = 0
+        self.recorded = 0
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.gz"
+
+    def __contains__(self, request: requests.PreparedRequest) -> bool:
+        return self._file(request_key(request)).exists()
+
+    def load(self, request: requests.PreparedRequest) -> requests.Response:
+        """Rebuild a `Response` from the cassette store without touching the network.
+
+        Raises:
+            CassetteError: No recording exists for the request.
+        """
+        file = self._file(request_key(request))
+        if not file.exists():
+            raise CassetteError(f"No recorded response for {request.method} {request.url} in {self.path}.")
+        with gzip.open(file, "rb") as f:
+            header = json.loads(f.readline())
+            content = f.read()
+
+        response = requests.Response()
+        response.status_code = header["status_code"]
+        response.reason = header.get("reason")
+        response.headers = CaseInsensitiveDict(header.get("headers", {}))
+        response.encoding = header.get("encoding")
+        response.url = header.get("url", request.url)
+        response.request = request
+        response._content = content
+        self.hits += 1
+        return response
+
+    def save(self, request: requests.PreparedRequest, response: requests.Response) -> bool:
+        """Write the response body byte-for-byte to the cassette store.
+        Unsuccessful responses (e.g., a transient 5xx or 429) are not saved, so they are requested again next time.
+
+        Returns:
+            bool: True if the response was saved.
+        """
+        if not response.ok:
+            return False
+        self.path.mkdir(parents=True, exist_ok=True)
+        header = {
+            "method": request.method,
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "encoding": response.encoding,
+            # drop transfer headers; the stored body is already decoded
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "transfer-encoding", "content-length")},
+            }
+        with gzip.open(self._file(request_key(request)), "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(response.content)
+        self.recorded += 1
+        return True
+
+
+def _cassette_send(session, request, **kwargs):
+    """Send through the innermost cassette of the current thread, or normally if the thread has none."""
+    cassettes = getattr(_ACTIVE, "cassettes", None)
+    if not cassettes:
+        return _SEND(session, request, **kwargs)
+    cassette = cassettes[-1]
+    if cassette.mode == "replay" or (cassette.mode == "auto" and request in cassette):
+        return cassette.load(request)
+    response = _SEND(session, request, **kwargs)
+    cassette.save(request, response)
+    return response
+
+
+@contextmanager
+def use_cassette(path: Path | str, mode: str = "replay"):
+    """Route `requests` traffic from the current thread through a cassette for the duration of the block.
+
+    The patch on `requests.Session.send` is process-wide, but it only routes requests from threads that have an active cassette;
+    other threads (e.g., a server handling requests while a test replays) send normally.
+    Nested blocks use the innermost cassette, and blocks may overlap across threads.
+
+    Args:
+        path (Path | str): Directory holding the cassette files.
+        mode (str, optional): One of "replay", "record", or "auto". Defaults to "replay".
+
+    Yields:
+        Cassette: The active cassette.
+
+    Example:
+        >>> with use_cassette(Path("tests/cassettes"), mode="auto"):
+        ...     df = retrieve_documents("2024-06-03", "2024-06-07")
+    """
+    global _PATCH_COUNT, _SEND
+    cassette = Cassette(path, mode=mode)
+    with _PATCH_LOCK:
+        if _PATCH_COUNT == 0:
+            _SEND = requests.Session.send
+            requests.Session.send = _cassette_send
+        _PATCH_COUNT += 1
+    cassettes = _ACTIVE.__dict__.setdefault("cassettes", [])
+    cassettes.append(cassette)
+    try:
+        yield cassette
+    finally:
+        cassettes.remove(cassette)
+        with _PATCH_LOCK:
+            _PATCH_COUNT -= 1
+            if _PATCH_COUNT == 0:
+                requests.Session.send = _SEND
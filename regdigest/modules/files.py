@@ -0,0 +1,27 @@
+# write files atomically so readers never see a partially written file
+
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import tempfile
+
+
+@contextmanager
+def atomic_write(path: Path | str):
+    """Yield a temporary path next to `path` and move it into place when the block finishes.
+    The temporary file is removed instead if the block raises an error.
+
+    Example:
+        >>> with atomic_write(Path("output/data.json")) as tmp:
+        ...     tmp.write_text("{}", encoding="utf-8")
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        yield Path(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -1,20 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
 import itertools
+import os
 import re
 
-from numpy import array
+from numpy import array, concatenate
 from pandas import DataFrame
 
+# row count at which regex searches switch to a process pool (only with more than one CPU)
+PARALLEL_THRESHOLD = 100_000
+
+# process pool shared by all parallel searches; created on first use
+_POOL = None
+_POOL_WORKERS = 0
+
+# compiled patterns held by each worker process, keyed by (pattern, flags)
+_WORKER_PATTERNS = {}
+
 
 class FilterError(Exception):
     pass
 
 
+def get_pool(workers: int = None) -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it (or resizing it) when needed."""
+    global _POOL, _POOL_WORKERS
+    workers = workers or os.cpu_count() or 1
+    if _POOL is None or _POOL_WORKERS != workers:
+        shutdown_pool()
+        _POOL, _POOL_WORKERS = ProcessPoolExecutor(max_workers=workers), workers
+    return _POOL
+
+
+def shutdown_pool():
+    """Shut down the shared process pool, if running."""
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None:
+        _POOL.shutdown()
+    _POOL, _POOL_WORKERS = None, 0
+
+
+def _search_shard(task: tuple):
+    """Return a boolean mask for one shard of column values; missing values never match.
+    Each worker compiles a pattern the first time it sees it and reuses it for later shards and calls.
+    """
+    pattern, re_flags, values = task
+    regex = _WORKER_PATTERNS.get((pattern, re_flags))
+    if regex is None:
+        regex = _WORKER_PATTERNS[(pattern, re_flags)] = re.compile(pattern, re_flags)
+    return array([isinstance(v, str) and regex.search(v) is not None for v in values], dtype=bool)
+
+
+def parallel_search(df: DataFrame, 
+                    inputs: list[tuple], 
+                    re_flags = re.I|re.X, 
+                    workers: int = None):
+    """Search (pattern, column) pairs by sharding column values across the shared process pool.
+    All pairs are submitted in one batch; only lists of strings are sent to the workers, and only boolean masks are returned.
+
+    Args:
+        df (DataFrame): Input data in format of pandas dataframe.
+        inputs (list[tuple]): List of (pattern, column) pairs.
+        re_flags (optional): Regex flags to use. Defaults to re.I | re.X.
+        workers (int, optional): Number of worker processes. Defaults to os.cpu_count().
+
+    Returns:
+        list: Boolean arrays, one for each input pair.
+    """
+    pool = get_pool(workers)
+    shard_size = max(-(-len(df) // _POOL_WORKERS), 1)
+    
+    tasks, shards_per_input = [], []
+    for pattern, column in inputs:
+        values = df[column].tolist()
+        shards = [values[i:i + shard_size] for i in range(0, len(values), shard_size)]
+        tasks.extend((pattern, re_flags | re.I, shard) for shard in shards)
+        shards_per_input.append(len(shards))
+    
+    masks = list(pool.map(_search_shard, tasks))
+    
+    bool_list, start = [], 0
+    for n in shards_per_input:
+        bool_list.append(concatenate(masks[start:start + n]) if n else array([], dtype=bool))
+        start += n
+    return bool_list
+
+
 def search_columns(df: DataFrame, 
                    patterns: list, 
                    columns: list, 
                    return_as: str = "indicator_column", 
                    return_column: str = "indicator", 
-                   re_flags = re.I|re.X):
+                   re_flags = re.I|re.X, 
+                   parallel: bool = None):
     """Search columns for string patterns within dataframe columns.
 
     Args:
@@ -23,6 +100,7 @@ def search_columns(df: DataFrame,
         columns (list): List of column names to search for input patterns.
         return_as (str, optional): Choose whether to return a DataFrame with indicator column ("indicator_column") or a DataFrame filtered by the search terms ("filtered_df"). Defaults to "indicator_column".
         re_flags (optional): Regex flags to use. Defaults to re.I | re.X.
+        parallel (bool, optional): Search using a process pool. Defaults to None, which uses a pool when `df` has at least `PARALLEL_THRESHOLD` rows and more than one CPU is available.
 
     Raises:
         TypeError: Raises exception when `patterns` or `columns` parameters are not lists.
@@ -45,24 +123,25 @@ def search_columns(df: DataFrame,
         # create list of inputs in format [(pattern1, column1),(pattern2, column2), ...]
         inputs = list(zip(patterns,columns))
         
-        # loop over list of inputs
-        for i in inputs:
-            searchre = df[i[1]].str.contains(i[0], regex=True, case=False, flags=re_flags)
-            searchbool = array([True if n is True else False for n in searchre])
-            bool_list.append(searchbool)
-        
     elif (len(patterns) == 1) and (len(patterns) != len(columns)):
         # create list of inputs in format [(pattern, column1),(pattern, column2), ...]
         inputs = list(itertools.product(patterns, columns))
-        
+           
+    else:  # eg, patterns formatted as a list of len(n>1) but does not match len(columns)
+        raise ValueError("Length of inputs are incorrect. Lengths of 'patterns' and 'columns' must match or a single pattern can map to multiple columns.")
+    
+    if parallel is None:
+        # a single worker only adds pickling overhead
+        parallel = len(df) >= PARALLEL_THRESHOLD and (os.cpu_count() or 1) > 1
+    
+    if parallel:
+        bool_list = parallel_search(df, inputs, re_flags=re_flags)
+    else:
         # loop over list of inputs
         for i in inputs:
             searchre = df[i[1]].str.contains(i[0], regex=True, case=False, flags=re_flags)
             searchbool = array([True if n is True else False for n in searchre])
             bool_list.append(searchbool)
-           
-    else:  # eg, patterns formatted as a list of len(n>1) but does not match len(columns)
-        raise ValueError("Length of inputs are incorrect. Lengths of 'patterns' and 'columns' must match or a single pattern can map to multiple columns.")
 
     # combine each "searchbool" array elementwise
     # we want a positive match for any column to evaluate as True
@@ -86,12 +165,13 @@ def search_columns(df: DataFrame,
         raise ValueError("Incorrect input for 'return_as' parameter.")
 
 
-def filter_corrections(df: DataFrame):
+def filter_corrections(df: DataFrame, parallel: bool = None):
     """Filter out corrections from Federal Register documents. 
     Identifies corrections using `corrrection_of` field and regex searches of `document_number`, `title`, and `action` fields.
 
     Args:
         df (DataFrame): Federal Register data.
+        parallel (bool, optional): Run regex searches in a process pool. Defaults to None (decided by row count and CPU count).
 
     Returns:
         tuple[DataFrame, DataFrame]: Tuple of data without corrections, data with corrections.
@@ -103,12 +183,11 @@ def filter_corrections(df: DataFrame):
     # 1. Using correction fields
     bool_na = df.loc[:, "correction_of"].isna().to_numpy()
     
-    # 2. Searching other fields
-    search_1 = search_columns(df, [r"^C[\d]"], ["document_number"], 
-                                 return_column="indicator1")
-    search_2 = search_columns(df, [r"(?:;\scorrection\b)|(?:\bcorrecting\samend[\w]+\b)"], ["title", "action"], 
-                                 return_column="indicator2")
-    bool_search = array(search_1["indicator1"] == 1) | array(search_2["indicator2"] == 1)
+    # 2. Searching other fields (in one batch, so a parallel search shares a single pool call)
+    correction_pattern = r"(?:;\scorrection\b)|(?:\bcorrecting\samend[\w]+\b)"
+    search = search_columns(df, [r"^C[\d]", correction_pattern, correction_pattern], ["document_number", "title", "action"], 
+                            return_column="indicator", parallel=parallel)
+    bool_search = array(search["indicator"] == 1)
     
     # separate corrections from non-corrections
     df_no_corrections = df.loc[(bool_na & ~bool_search), cols]  # remove flagged documents
@@ -122,7 +201,7 @@ def filter_corrections(df: DataFrame):
         return df_no_corrections, df_corrections
 
 
-def filter_actions(df: DataFrame, pattern: str = None, filters: tuple[str] | list[str] = (), columns: tuple | list = ()):
+def filter_actions(df: DataFrame, pattern: str = None, filters: tuple[str] | list[str] = (), columns: tuple | list = (), parallel: bool = None):
     # get original column names
     cols = df.columns.tolist()
     
@@ -137,7 +216,8 @@ def filter_actions(df: DataFrame, pattern: str = None, filters: tuple[str] | lis
         df, 
         [regex], 
         list(columns), 
-        return_column="indicator"
+        return_column="indicator", 
+        parallel=parallel, 
         )
     bool_search = array(search["indicator"] == 1)
     print(f"{sum(bool_search)} documents filtered out.")
@@ -0,0 +1,64 @@
+# server-side filtering, sorting, and paging for the data grid in the web app
+# queries run lazily over a polars frame so only the requested page is materialized
+
+from math import ceil
+
+import polars as pl
+from pandas import DataFrame as pd_DataFrame
+
+
+def to_grid_frame(df: pd_DataFrame, columns: list | tuple = ()) -> pl.DataFrame:
+    """Convert results to a polars frame with string columns for filtering.
+
+    Args:
+        df (DataFrame): Results from `retrieve_documents`.
+        columns (list | tuple, optional): Columns to keep. Defaults to () (all columns).
+
+    Returns:
+        pl.DataFrame: Columnar copy of the results.
+    """
+    if columns:
+        df = df.loc[:, [c for c in columns if c in df.columns]]
+    df = df.astype(str).replace({"nan": "", "None": "", "<NA>": ""})
+    return pl.from_pandas(df).with_columns(pl.all().cast(pl.String))
+
+
+def clamp_page(page: int, total: int, page_size: int) -> int:
+    """Keep a page number between 1 and the last page."""
+    return min(max(int(page), 1), max(ceil(total / max(int(page_size), 1)), 1))
+
+
+def query_page(
+        df: pl.DataFrame,
+        filters: dict[str, str] | None = None,
+        sort_by: str | None = None,
+        descending: bool = False,
+        page: int = 1,
+        page_size: int = 50,
+    ) -> tuple[pl.DataFrame, int]:
+    """Filter, sort, and slice the data, returning one page of rows.
+
+    Args:
+        df (pl.DataFrame): Grid data from `to_grid_frame`.
+        filters (dict[str, str] | None, optional): Mapping of column to case-insensitive substring. Empty values are ignored. Defaults to None.
+        sort_by (str | None, optional): Column to sort by. Defaults to None (keep order).
+        descending (bool, optional): Sort in descending order. Defaults to False.
+        page (int, optional): Page number, starting at 1; out-of-range pages are clamped. Defaults to 1.
+        page_size (int, optional): Rows per page. Defaults to 50.
+
+    Returns:
+        tuple[pl.DataFrame, int]: Rows on the page, total rows matching the filters.
+    """
+    lf = df.lazy()
+    for column, value in (filters or {}).items():
+        if value and column in df.columns:
+            lf = lf.filter(pl.col(column).str.to_lowercase().str.contains(value.lower(), literal=True))
+
+    total = lf.select(pl.len()).collect().item()
+
+    if sort_by in df.columns:
+        lf = lf.sort(sort_by, descending=descending, maintain_order=True)
+
+    page_size = max(int(page_size), 1)
+    page = clamp_page(page, total, page_size)
+    return lf.slice((page - 1) * page_size, page_size).collect(), total
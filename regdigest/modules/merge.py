@@ -0,0 +1,62 @@
+# combine outputs from overlapping runs (e.g., weekly digest, catch-up re-run, input file)
+# only documents appearing in more than one input are resolved; the rest pass through untouched
+
+from pandas import DataFrame, concat
+import polars as pl
+
+# significance fields that can change between runs; the newest non-missing value wins
+RESOLVE_COLUMNS = ("significant", "3f1_significant", "major")
+
+
+def _to_indexed(df: DataFrame | pl.DataFrame) -> DataFrame:
+    """Return a pandas frame indexed by document_number from `retrieve_documents` output or a stored partition."""
+    if isinstance(df, pl.DataFrame):
+        df = df.to_pandas()
+    if df.index.name != "document_number":
+        df = df.set_index("document_number")
+    return df
+
+
+def merge_results(*frames: DataFrame | pl.DataFrame, priority: list | tuple = None) -> DataFrame:
+    """Merge results from overlapping runs, keeping one row per `document_number`.
+
+    For documents in more than one input, the row from the newest input is kept,
+    and `RESOLVE_COLUMNS` (significance) take the newest non-missing value.
+    Inputs are newest last unless `priority` is given; ties are broken by input order.
+
+    Args:
+        *frames (DataFrame | pl.DataFrame): Outputs of `retrieve_documents` or frames read from a `DigestStore`.
+        priority (list | tuple, optional): Sortable value for each frame (e.g., retrieval date), higher is newer. Defaults to None (input order).
+
+    Returns:
+        DataFrame: Merged data indexed by document_number, sorted by publication date and document number.
+    """
+    frames = [_to_indexed(df) for df in frames if df is not None]
+    if not frames:
+        return None
+    if priority is None:
+        priority = range(len(frames))
+    elif len(priority) != len(frames):
+        raise ValueError("Parameter 'priority' must have one value for each frame.")
+
+    # hash-based lookup of document numbers appearing more than once
+    keys = frames[0].index.append([df.index for df in frames[1:]])
+    overlap = keys[keys.duplicated()].unique()
+
+    passthrough = [df.loc[~df.index.isin(overlap)] for df in frames]
+    if len(overlap) > 0:
+        overlapping = concat(
+            [df.loc[df.index.isin(overlap)].assign(_priority=p, _order=n) for n, (df, p) in enumerate(zip(frames, priority))]
+            ).sort_values(["_priority", "_order"], kind="stable")
+        resolved = overlapping.loc[~overlapping.index.duplicated(keep="last")].copy()
+        resolve_cols = [c for c in RESOLVE_COLUMNS if c in overlapping.columns]
+        if resolve_cols:
+            # groupby.last skips missing values, so this is the newest non-missing value
+            resolved.loc[:, resolve_cols] = overlapping.groupby(level=0)[resolve_cols].last().reindex(resolved.index)
+        passthrough.append(resolved.drop(columns=["_priority", "_order"]))
+        print(f"{len(overlap)} overlapping documents merged.")
+
+    df = concat([df for df in passthrough if len(df) > 0] or passthrough[:1])
+    sort_cols = [c for c in ("publication_date", ) if c in df.columns]
+    df = df.rename_axis("document_number").reset_index().sort_values(sort_cols + ["document_number"], kind="stable")
+    return df.set_index("document_number")
@@ -0,0 +1,257 @@
+# benchmark filter patterns for catastrophic backtracking
+# run as a check before changing regex_filters.py: python -m regdigest.modules.pattern_performance
+
+import multiprocessing
+import re
+import time
+
+# reference pattern timed on the same machine to set the budget; one unbounded wildcard between literals scales quadratically
+BASELINE_PATTERN = r"Notice.*Meeting"
+
+# multiple of the baseline time allowed per pattern at the largest size
+BUDGET_FACTOR = 30
+
+# seconds before benchmarking a single pattern is stopped and counted as a failure
+PATTERN_TIMEOUT = 5.0
+
+# time ratio between successive sizes (each double the last) above which scaling is flagged; linear is ~2
+SCALING_LIMIT = 3.0
+
+# lengths of adversarial titles in characters; long FR titles run to around 1,000 characters
+TITLE_LENGTHS = (250, 500, 1000)
+
+# realistic titles searched alongside the adversarial ones
+SAMPLE_TITLES = (
+    "Air Plan Approval; Ohio; Revisions to the Ohio State Implementation Plan",
+    "Sunshine Act Meetings",
+    "Energy Conservation Program: Energy Conservation Standards for Consumer Furnaces",
+    "Medicare Program; Hospital Inpatient Prospective Payment Systems for Acute Care Hospitals and the Long-Term Care Hospital Prospective Payment System and Policy Changes and Fiscal Year 2025 Rates",
+    "Agency Information Collection Activities; Submission to the Office of Management and Budget for Review and Approval; Comment Request; Generic Clearance for Customer Service Surveys",
+    "National Institute of Allergy and Infectious Diseases; Notice of Closed Meeting",
+    "Advisory Committee on Reactor Safeguards; Notice of Meeting",
+    "Safety Zone; Fireworks Display, Delaware River, Philadelphia, PA",
+    "Coastwise Endorsement Eligibility Determination for a Foreign-Built Vessel: SEA DREAM (Sail); Invitation for Public Comments",
+    "Privacy Act of 1974; System of Records",
+    "Nondiscrimination in Health Programs and Activities",
+    "Protecting Workers From the Risk of Heat Injury and Illness in Outdoor and Indoor Work Settings",
+    )
+
+
+class PatternPerformanceError(Exception):
+    pass
+
+
+def literal_text(pattern: str) -> str:
+    """Approximate the text a pattern matches, keeping the first branch of each group and dropping optional parts.
+
+    Example:
+        >>> literal_text(r"^Notice\\sof\\s(?:Public\\s)?(?:Briefing|Meeting)")
+        'Notice of Public Briefing'
+    """
+    text = re.sub(r"\(\?:([^|()]*)(?:\|[^()]*)?\)\??", r"\1", pattern)
+    text = re.sub(r"\[[^\]]*\][?*+]?", "", text)
+    text = re.sub(r"\\s[?*+]?", " ", text)
+    text = re.sub(r"\\[bBAZ]|\\[dw][*+?]?|\.[*+?]?|\{\d+(?:,\d*)?\}|[\^$]", " ", text)
+    return " ".join(text.replace("\\", "").split())
+
+
+def adversarial_titles(pattern: str, length: int) -> list[str]:
+    """Create titles of a given length that repeatedly start, but never finish, a match of the pattern.
+    Repeating the leading text before an unbounded `.*` or `.+` makes backtracking patterns do super-linear work,
+    and near misses ending in a character that can't complete the match make nested quantifiers like `(a+)+$` backtrack.
+
+    Args:
+        pattern (str): Regex pattern.
+        length (int): Length of each title in characters.
+
+    Returns:
+        list[str]: Adversarial titles.
+    """
+    words = literal_text(pattern).split()
+    prefixes = [" ".join(words[:-1]) or "a"]
+    # repeat every leading segment before an unbounded wildcard, e.g. "National Institute " for National.*Institute.*Notice
+    segments = [literal_text(s) for s in re.split(r"(?<!\\)\.[*+]", pattern)]
+    if len(segments) > 1:
+        prefixes.append(" ".join(s for s in segments[:-1] if s))
+
+    titles = [(f"{p} " * (length // (len(p) + 1) + 1))[:length] for p in prefixes]
+    titles.append("a" * length)
+    titles.extend([f"{t[:-1]}!" for t in titles])
+    titles.append(" " * length)
+    return titles
+
+
+def time_search(regex: re.Pattern, titles: list | tuple, repeat: int = 3) -> float:
+    """Best time in seconds to search every title with the compiled regex."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for title in titles:
+            regex.search(title)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time_pattern(
+        pattern: str,
+        corpus: list | tuple,
+        lengths: tuple[int],
+        budget: float,
+        re_flags,
+    ) -> dict:
+    """Time one pattern against the corpus and adversarial titles, stopping at the first length over budget."""
+    regex = re.compile(pattern, re_flags)
+    corpus_time = time_search(regex, corpus)
+    times = []
+    for n in lengths:
+        times.append(time_search(regex, adversarial_titles(pattern, n)))
+        if times[-1] > budget:
+            break
+    return {"times": times, "corpus_time": corpus_time}
+
+
+def _benchmark_worker(connection, patterns: list, options: dict) -> None:
+    """Send timings for each pattern through the connection as soon as it finishes."""
+    for pattern in patterns:
+        connection.send(_time_pattern(pattern, **options))
+    connection.close()
+
+
+def _time_with_timeout(patterns: list, options: dict, timeout: float) -> list[dict | None]:
+    """Time patterns in a worker process, stopping any pattern that runs longer than the timeout.
+    The worker is restarted after a timeout to continue with the remaining patterns.
+
+    Returns:
+        list[dict | None]: Timings for each pattern, or None if it timed out.
+    """
+    context = multiprocessing.get_context()
+    timings, remaining = [], list(patterns)
+    while remaining:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_benchmark_worker, args=(sender, remaining, options), daemon=True)
+        process.start()
+        sender.close()
+        try:
+            while remaining:
+                if not receiver.poll(timeout):
+                    timings.append(None)
+                    remaining.pop(0)
+                    break
+                timings.append(receiver.recv())
+                remaining.pop(0)
+        except EOFError:
+            raise PatternPerformanceError(f"Benchmark worker exited while timing {remaining[0]}.")
+        finally:
+            process.terminate()
+            process.join()
+            receiver.close()
+    return timings
+
+
+def baseline_budget(
+        corpus: list | tuple = SAMPLE_TITLES,
+        length: int = TITLE_LENGTHS[-1],
+        budget_factor: float = BUDGET_FACTOR,
+        re_flags = re.I|re.X,
+    ) -> float:
+    """Time budget in seconds per pattern, as a multiple of `BASELINE_PATTERN` timed on this machine."""
+    timing = _time_pattern(BASELINE_PATTERN, corpus, (length, ), float("inf"), re_flags)
+    return budget_factor * max(timing["times"][-1], timing["corpus_time"])
+
+
+def benchmark_patterns(
+        patterns: list | tuple,
+        corpus: list | tuple = SAMPLE_TITLES,
+        lengths: tuple[int] = TITLE_LENGTHS,
+        budget: float = None,
+        scaling_limit: float = SCALING_LIMIT,
+        timeout: float = PATTERN_TIMEOUT,
+        re_flags = re.I|re.X,
+    ) -> list[dict]:
+    """Time each pattern against adversarial titles of increasing length and a realistic corpus.
+    Patterns run in a worker process, so one that backtracks catastrophically is stopped after `timeout` seconds.
+
+    Args:
+        patterns (list | tuple): Regex patterns, e.g. `FILTER_ROUTINE`.
+        corpus (list | tuple, optional): Realistic titles. Defaults to SAMPLE_TITLES.
+        lengths (tuple[int], optional): Adversarial title lengths, each double the last. Defaults to TITLE_LENGTHS.
+        budget (float, optional): Seconds allowed per pattern at the largest length or over the corpus.
+            Defaults to None (`baseline_budget` at the largest length).
+        scaling_limit (float, optional): Largest time ratio between successive lengths before flagging. Defaults to SCALING_LIMIT.
+        timeout (float, optional): Seconds before a pattern is stopped and counted as over budget. Defaults to PATTERN_TIMEOUT.
+        re_flags (optional): Regex flags to use, matching `search_columns`. Defaults to re.I | re.X.
+
+    Returns:
+        list[dict]: One result per pattern with timings, "super_linear", "timed_out", and "over_budget" flags.
+    """
+    # invalid patterns raise here rather than in the worker
+    for pattern in patterns:
+        re.compile(pattern, re_flags)
+    if budget is None:
+        budget = baseline_budget(corpus, lengths[-1], re_flags=re_flags)
+
+    options = {"corpus": corpus, "lengths": lengths, "budget": budget, "re_flags": re_flags}
+    results = []
+    for pattern, timing in zip(patterns, _time_with_timeout(patterns, options, timeout)):
+        if timing is None:
+            results.append({
+                "pattern": pattern,
+                "times": [],
+                "corpus_time": None,
+                "scaling": float("inf"),
+                "super_linear": True,
+                "timed_out": True,
+                "over_budget": True,
+                "budget": budget,
+                })
+            continue
+        times = timing["times"]
+        # ignore ratios between timings too small to measure reliably
+        ratios = [b / a for a, b in zip(times, times[1:]) if a > 1e-5]
+        results.append({
+            "pattern": pattern,
+            "times": times,
+            "corpus_time": timing["corpus_time"],
+            "scaling": max(ratios, default=1.0),
+            "super_linear": any(r > scaling_limit for r in ratios),
+            "timed_out": False,
+            "over_budget": max(times[-1], timing["corpus_time"]) > budget,
+            "budget": budget,
+            })
+    return results
+
+
+def _describe(result: dict) -> str:
+    if result["timed_out"]:
+        return "timed out"
+    return f"{max(result['times'][-1], result['corpus_time']) * 1000:.1f} ms of {result['budget'] * 1000:.1f} ms"
+
+
+def check_patterns(patterns: list | tuple, **kwargs) -> list[dict]:
+    """Benchmark patterns and raise an error if any exceed the time budget or time out.
+
+    Raises:
+        PatternPerformanceError: One or more patterns are over budget.
+
+    Returns:
+        list[dict]: Results for patterns flagged for super-linear scaling (within budget).
+    """
+    results = benchmark_patterns(patterns, **kwargs)
+    failed = [r for r in results if r["over_budget"]]
+    if failed:
+        details = "; ".join(f"{r['pattern']} ({_describe(r)})" for r in failed)
+        raise PatternPerformanceError(f"{len(failed)} pattern(s) over the time budget: {details}")
+    return [r for r in results if r["super_linear"]]
+
+
+if __name__ == "__main__":
+
+    from ..regex_filters import FILTER_ROUTINE
+
+    results = benchmark_patterns(FILTER_ROUTINE)
+    for r in sorted(results, key=lambda r: r["times"][-1] if r["times"] else float("inf"), reverse=True):
+        flags = " ".join(f for f in ("super_linear", "timed_out", "over_budget") if r[f])
+        print(f"{_describe(r):>24}  x{r['scaling']:.1f}  {flags:36}  {r['pattern']}")
+
+    if any(r["over_budget"] for r in results):
+        raise SystemExit(1)
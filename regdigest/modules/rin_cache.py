@@ -0,0 +1,90 @@
+# memoize RIN enrichment across documents and runs
+# many documents (and many weekly runs) share the same regulation_id_number_info payloads
+
+import json
+from pathlib import Path
+from threading import RLock
+
+from fr_toolbelt.preprocessing import RegInfoData
+
+from .files import atomic_write
+
+
+class RinCache:
+    """Cache of parsed RIN info keyed by the raw `regulation_id_number_info` payload.
+    The payload is keyed by RIN, so its JSON identifies both the RINs and their Unified Agenda details;
+    a new RIN or a changed payload creates a new entry, and only those entries are processed with `RegInfoData`.
+    Keys keep the payload's RIN order because `RegInfoData` uses the last RIN, so reordered payloads are cached separately.
+    Methods hold `lock`, so one cache can be shared by every session in a process.
+
+    Args:
+        entries (dict, optional): Mapping of payload key to (rin, rin_priority) values. Defaults to None.
+        field_key (str, optional): Field containing RIN info. Defaults to "regulation_id_number_info".
+        value_keys (tuple[str], optional): Fields created from RIN info. Defaults to ("rin", "rin_priority").
+    """
+    def __init__(self,
+                 entries: dict = None,
+                 field_key: str = "regulation_id_number_info",
+                 value_keys: tuple[str] = ("rin", "rin_priority")
+                 ) -> None:
+        self.entries = entries if entries is not None else {}
+        self.field_key = field_key
+        self.value_keys = value_keys
+        self.misses = 0
+        self.lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _key(self, document: dict) -> str:
+        return json.dumps(document.get(self.field_key, {}), separators=(",", ":"))
+
+    def process_data(self, documents: list[dict]) -> list[dict]:
+        """Add RIN values to documents and drop the raw RIN field, matching `RegInfoData(documents).process_data()`.
+
+        Args:
+            documents (list[dict]): Documents from the Federal Register API.
+
+        Returns:
+            list[dict]: Documents with "rin" and "rin_priority" fields.
+        """
+        with self.lock:
+            keys = [self._key(doc) for doc in documents]
+
+            # process each new payload once
+            new = {k: doc for k, doc in zip(keys, documents) if k not in self.entries}
+            if new:
+                processed = RegInfoData([{self.field_key: doc.get(self.field_key, {})} for doc in new.values()], field_key=self.field_key).process_data()
+                for k, doc in zip(new, processed):
+                    self.entries[k] = [doc.get(v) for v in self.value_keys]
+                self.misses += len(new)
+
+            results = []
+            for k, doc in zip(keys, documents):
+                doc_copy = {key: value for key, value in doc.items() if key != self.field_key}
+                doc_copy.update(zip(self.value_keys, self.entries[k]))
+                results.append(doc_copy)
+            return results
+
+    def save(self, path: Path) -> None:
+        """Save cache entries as JSON, keeping entries another process saved to the same file.
+        The file is replaced atomically, so readers never see a partial file.
+        """
+        path = Path(path)
+        with self.lock:
+            if path.exists():
+                with open(path, encoding="utf-8") as f:
+                    # entries depend only on their key, so merging is safe
+                    self.entries = {**json.load(f), **self.entries}
+            with atomic_write(path) as tmp:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f)
+
+    @classmethod
+    def load(cls, path: Path, **kwargs):
+        """Load cache entries from file, or return an empty cache if the file doesn't exist."""
+        path = Path(path)
+        if not path.exists():
+            return cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            return cls(entries=json.load(f), **kwargs)
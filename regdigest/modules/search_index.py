@@ -0,0 +1,236 @@
+# inverted index over document titles, actions, and agency names
+# supports keyword and "quoted phrase" queries without re-retrieving documents
+
+import gzip
+import json
+import os
+from pathlib import Path
+import re
+from threading import RLock
+
+from .files import atomic_write
+
+INDEX_FIELDS = ("title", "action", "agency_names")
+STORED_FIELDS = ("document_number", "publication_date", "agency_names", "title", "type", "action", "html_url")
+
+# offset between fields so phrases can't match across them
+FIELD_GAP = 10_000
+
+# journal size in bytes at which `save_changes` merges it into the full index
+COMPACT_SIZE = 5_000_000
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase word tokens."""
+    if not isinstance(text, str):
+        return []
+    return re.findall(r"\w+", text.lower())
+
+
+def parse_query(query: str) -> list[list[str]]:
+    """Parse a query into terms; quoted text becomes a multi-token phrase.
+
+    Example:
+        >>> parse_query('"air plan" ohio')
+        [['air', 'plan'], ['ohio']]
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        tokens = tokenize(phrase or word)
+        if phrase:
+            terms.append(tokens)
+        else:
+            terms.extend([t] for t in tokens)
+    return [t for t in terms if t]
+
+
+class SearchIndex:
+    """Positional inverted index of Federal Register documents keyed by `document_number`.
+    Documents can be added incrementally; re-adding a document replaces its previous entry.
+    Changes since the last save are kept in `pending`, so `save_changes` only appends those to a journal next to the index file.
+    Methods hold `lock`, so one index can be shared by every session in a process.
+
+    Args:
+        postings (dict, optional): Mapping of token to {document_number: positions}. Defaults to None.
+        documents (dict, optional): Mapping of document_number to stored fields. Defaults to None.
+    """
+    def __init__(self, postings: dict = None, documents: dict = None) -> None:
+        self.postings = postings if postings is not None else {}
+        self.documents = documents if documents is not None else {}
+        self.pending = []
+        self.lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, document_number: str) -> bool:
+        return document_number in self.documents
+
+    @staticmethod
+    def _positions(document: dict) -> dict[str, list[int]]:
+        positions = {}
+        for n, field in enumerate(INDEX_FIELDS):
+            for i, token in enumerate(tokenize(document.get(field))):
+                positions.setdefault(token, []).append(n * FIELD_GAP + i)
+        return positions
+
+    def remove_document(self, document_number: str) -> None:
+        """Remove a document and its postings from the index."""
+        document = self.documents.pop(document_number, None)
+        if document is None:
+            return
+        for token in self._positions(document):
+            docs = self.postings.get(token, {})
+            docs.pop(document_number, None)
+            if not docs:
+                self.postings.pop(token, None)
+
+    def add_documents(self, documents: list[dict]) -> int:
+        """Add documents to the index.
+
+        Args:
+            documents (list[dict]): Records with a "document_number" key, e.g. `df.reset_index().to_dict("records")`.
+
+        Returns:
+            int: Number of documents added or updated.
+        """
+        with self.lock:
+            count = 0
+            for document in documents:
+                document_number = document.get("document_number")
+                if document_number is None:
+                    continue
+                stored = {k: (v if isinstance(v, str) else None) for k, v in document.items() if k in STORED_FIELDS}
+                if self.documents.get(document_number) == stored:
+                    continue
+                self.remove_document(document_number)
+                self.documents[document_number] = stored
+                for token, positions in self._positions(stored).items():
+                    self.postings.setdefault(token, {})[document_number] = positions
+                self.pending.append(stored)
+                count += 1
+            return count
+
+    def _match_phrase(self, tokens: list[str], candidates: set = None) -> set:
+        docs = [self.postings.get(t, {}) for t in tokens]
+        # start from the rarest token, limited to documents matched by earlier terms
+        for d in sorted(docs, key=len):
+            candidates = set(d) if candidates is None else candidates.intersection(d)
+            if not candidates:
+                return candidates
+        if len(tokens) == 1:
+            return candidates
+        matches = set()
+        for document_number in candidates:
+            following = [set(d[document_number]) for d in docs[1:]]
+            if any(all(p + i in positions for i, positions in enumerate(following, start=1)) for p in docs[0][document_number]):
+                matches.add(document_number)
+        return matches
+
+    def search(self, query: str, start_date: str = None, end_date: str = None) -> list[dict]:
+        """Find documents matching every keyword and phrase in the query.
+
+        Args:
+            query (str): Keywords and "quoted phrases"; all terms must match.
+            start_date (str, optional): Earliest publication date (yyyy-mm-dd). Defaults to None.
+            end_date (str, optional): Latest publication date (yyyy-mm-dd). Defaults to None.
+
+        Returns:
+            list[dict]: Stored documents, newest first.
+        """
+        with self.lock:
+            terms = sorted(parse_query(query), key=lambda t: min(len(self.postings.get(token, {})) for token in t))
+            if not terms:
+                return []
+            matches = None
+            for term in terms:
+                matches = self._match_phrase(term, matches)
+                if not matches:
+                    return []
+
+            results = [self.documents[d] for d in matches]
+            if start_date is not None:
+                results = [r for r in results if (r.get("publication_date") or "") >= f"{start_date}"]
+            if end_date is not None:
+                results = [r for r in results if (r.get("publication_date") or "") <= f"{end_date}"]
+            return sorted(results, key=lambda r: (r.get("publication_date") or "", r.get("document_number")), reverse=True)
+
+    @staticmethod
+    def _journal(path: Path) -> Path:
+        return path.with_name(f"{path.name}.journal")
+
+    @staticmethod
+    def _compacting(path: Path) -> Path:
+        return path.with_name(f"{path.name}.compacting")
+
+    def _write(self, path: Path) -> None:
+        with atomic_write(path) as tmp:
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump({"postings": self.postings, "documents": self.documents}, f)
+
+    def save(self, path: Path) -> None:
+        """Save the full index as gzip-compressed JSON, replacing the index file and its journal."""
+        path = Path(path)
+        with self.lock:
+            self._write(path)
+            self._journal(path).unlink(missing_ok=True)
+            self.pending = []
+
+    def save_changes(self, path: Path) -> None:
+        """Append documents added since the last save to the journal (one JSON line each).
+        Calls `compact` once the journal reaches `COMPACT_SIZE` bytes or no index file exists.
+        """
+        path = Path(path)
+        journal = self._journal(path)
+        with self.lock:
+            if self.pending:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(journal, "a", encoding="utf-8") as f:
+                    f.writelines(f"{json.dumps(doc)}\n" for doc in self.pending)
+                self.pending = []
+            if not path.exists() or (journal.exists() and journal.stat().st_size >= COMPACT_SIZE):
+                self.compact(path)
+
+    def compact(self, path: Path) -> None:
+        """Merge the journal into the index file.
+        The index is rebuilt from the files on disk rather than from memory, so documents journaled by other processes are kept.
+        The journal is moved aside first; entries appended meanwhile go to a new journal and are replayed on the next load.
+        """
+        path = Path(path)
+        journal, compacting = self._journal(path), self._compacting(path)
+        with self.lock:
+            if journal.exists():
+                if compacting.exists():  # left by an interrupted compaction; keep its entries first
+                    with open(compacting, "a", encoding="utf-8") as f:
+                        f.write(journal.read_text(encoding="utf-8"))
+                    journal.unlink()
+                else:
+                    os.replace(journal, compacting)
+            merged = self._read(path, compacting)
+            merged.add_documents(self.pending)
+            merged._write(path)
+            compacting.unlink(missing_ok=True)
+            self.postings, self.documents = merged.postings, merged.documents
+            self.pending = []
+
+    @classmethod
+    def _read(cls, path: Path, *journals: Path):
+        """Read an index file and replay journals in order; missing files are skipped."""
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            index = cls(postings=data.get("postings"), documents=data.get("documents"))
+        else:
+            index = cls()
+        for journal in journals:
+            if journal.exists():
+                with open(journal, encoding="utf-8") as f:
+                    index.add_documents(json.loads(line) for line in f if line.strip())
+        index.pending = []
+        return index
+
+    @classmethod
+    def load(cls, path: Path):
+        """Load an index and its journal from file, or return an empty index if neither exists."""
+        path = Path(path)
+        return cls._read(path, cls._compacting(path), cls._journal(path))
@@ -2,12 +2,14 @@
 # see: https://github.com/regulatorystudies/Reg-Stats/blob/main/data/fr_tracking/fr_tracking.csv
 
 from datetime import date
+from io import BytesIO
 
 import polars as pl
 from pandas import (
     DataFrame as pd_DataFrame, 
     read_csv as pd_read_csv, 
     )
+import requests
 
 
 def read_csv_data(
@@ -31,11 +33,13 @@ def read_csv_data(
     else:
         cols = list(retrieve_columns)
     
-    # read csv; try different encoding if raises error
+    # download csv with requests (so it can be served from a cassette); try different encoding if raises error
+    response = requests.get(url)
+    response.raise_for_status()
     try:
-        df_pd = pd_read_csv(url, usecols=cols)
+        df_pd = pd_read_csv(BytesIO(response.content), usecols=cols)
     except UnicodeDecodeError:
-        df_pd = pd_read_csv(url, usecols=cols, encoding="latin")
+        df_pd = pd_read_csv(BytesIO(response.content), usecols=cols, encoding="latin")
     df = pl.from_pandas(df_pd)
     
     if df.shape[1] == len(cols):
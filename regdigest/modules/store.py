@@ -0,0 +1,170 @@
+# local store of processed digests, partitioned by publication date
+# each date is one parquet file, and a manifest records which dates have been retrieved
+
+from datetime import date, datetime, timedelta
+import json
+from pathlib import Path
+from threading import RLock
+
+import polars as pl
+from pandas import DataFrame as pd_DataFrame
+
+from .files import atomic_write
+from .merge import merge_results
+
+MANIFEST_FILE = "manifest.json"
+
+# how long retrieved documents for today and later dates are served before they are retrieved again
+REFRESH_INTERVAL = timedelta(hours=1)
+
+
+def date_range(start_date: str | date, end_date: str | date) -> list[str]:
+    """List dates from start to end, inclusive, as yyyy-mm-dd strings."""
+    start, end = date.fromisoformat(f"{start_date}"), date.fromisoformat(f"{end_date}")
+    return [f"{start + timedelta(days=n)}" for n in range((end - start).days + 1)]
+
+
+def contiguous_ranges(dates: list[str]) -> list[tuple[str, str]]:
+    """Group sorted yyyy-mm-dd strings into (start, end) ranges of consecutive days."""
+    ranges = []
+    for d in sorted(dates):
+        if ranges and date.fromisoformat(d) - date.fromisoformat(ranges[-1][1]) == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], d)
+        else:
+            ranges.append((d, d))
+    return ranges
+
+
+class DigestStore:
+    """Processed documents from `retrieve_documents`, stored as one parquet partition per publication date.
+
+    Dates before today are retrieved once. Today and later dates may still get new documents,
+    so the manifest records when they were last retrieved and they are retrieved again after `refresh_interval`.
+
+    Args:
+        path (Path | str): Directory holding the partitions and manifest.
+        refresh_interval (timedelta, optional): Time before today and later dates are retrieved again. Defaults to REFRESH_INTERVAL.
+    """
+    def __init__(self, path: Path | str, refresh_interval: timedelta = REFRESH_INTERVAL) -> None:
+        self.path = Path(path)
+        self.refresh_interval = refresh_interval
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.lock = RLock()
+        manifest = self.path / MANIFEST_FILE
+        if manifest.exists():
+            with open(manifest, encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            data = {}
+        self.covered = set(data.get("covered", []))
+        self.fetched = data.get("fetched", {})
+        self.version = data.get("version", 0)
+
+    def _partition(self, publication_date: str) -> Path:
+        return self.path / f"{publication_date}.parquet"
+
+    def _save_manifest(self) -> None:
+        with atomic_write(self.path / MANIFEST_FILE) as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"covered": sorted(self.covered), "fetched": self.fetched, "version": self.version}, f)
+
+    def _is_missing(self, publication_date: str, today: str, cutoff: datetime) -> bool:
+        if publication_date in self.covered:
+            return False
+        fetched = self.fetched.get(publication_date)
+        # dates fetched as today or later are final once they're in the past
+        return fetched is None or publication_date < today or datetime.fromisoformat(fetched) < cutoff
+
+    def missing_ranges(self, start_date: str | date, end_date: str | date) -> list[tuple[str, str]]:
+        """Date ranges within start and end that haven't been retrieved yet or are due for a refresh."""
+        today, cutoff = f"{date.today()}", datetime.now() - self.refresh_interval
+        return contiguous_ranges([d for d in date_range(start_date, end_date) if self._is_missing(d, today, cutoff)])
+
+    def partitions(self, start_date: str | date = None, end_date: str | date = None) -> list[Path]:
+        """Paths of partitions with publication dates between start and end."""
+        files = sorted(self.path.glob("*.parquet"))
+        return [f for f in files if (start_date is None or f.stem >= f"{start_date}") and (end_date is None or f.stem <= f"{end_date}")]
+
+    def write(self, df: pd_DataFrame | None, start_date: str | date, end_date: str | date, merge: bool = True) -> None:
+        """Write partitions for the dates in `df` and mark the date range as retrieved.
+        Dates before today are marked as covered; today and later dates are marked with the retrieval time.
+        `version` only changes when a partition changes, and partitions are replaced atomically so unlocked readers never see a partial file.
+
+        Args:
+            df (DataFrame | None): Output of `retrieve_documents`; None when no documents were returned.
+            start_date (str | date): Start of the retrieved range.
+            end_date (str | date): End of the retrieved range.
+            merge (bool, optional): Merge into existing partitions with `merge_results` (new data is newest) instead of replacing them.
+                Only partitions for dates in `df` are read. Defaults to True.
+        """
+        with self.lock:
+            changed = False
+            if df is not None and len(df) > 0:
+                pl_df = pl.from_pandas(df.reset_index() if "document_number" not in df.columns else df)
+                for (publication_date, ), partition in pl_df.partition_by("publication_date", as_dict=True).items():
+                    file = self._partition(publication_date)
+                    if file.exists():
+                        existing = pl.read_parquet(file)
+                        if merge:
+                            partition = pl.from_pandas(merge_results(existing, partition).reset_index())
+                        if partition.equals(existing):
+                            continue
+                    with atomic_write(file) as tmp:
+                        partition.write_parquet(tmp)
+                    changed = True
+
+            # replace rather than update, so unlocked readers never iterate a changing collection
+            today, now = f"{date.today()}", datetime.now().isoformat(timespec="seconds")
+            dates = date_range(start_date, end_date)
+            self.covered = self.covered | {d for d in dates if d < today}
+            self.fetched = {**{d: t for d, t in self.fetched.items() if d >= today}, **{d: now for d in dates if d >= today}}
+            if changed:
+                self.version += 1
+            self._save_manifest()
+
+    def read(self, start_date: str | date = None, end_date: str | date = None) -> pl.DataFrame:
+        """Read documents published between start and end into one frame."""
+        frames = [pl.read_parquet(f) for f in self.partitions(start_date, end_date)]
+        if not frames:
+            return pl.DataFrame({"document_number": [], "publication_date": []}, schema={"document_number": pl.String, "publication_date": pl.String})
+        return pl.concat(frames, how="diagonal_relaxed")
+
+    def query(
+            self,
+            start_date: str | date = None,
+            end_date: str | date = None,
+            agency: str = None,
+            document_type: str = None,
+            significant: int = None,
+            f1_significant: int = None,
+        ) -> pl.DataFrame:
+        """Filter stored documents.
+
+        Args:
+            start_date (str | date, optional): Earliest publication date. Defaults to None.
+            end_date (str | date, optional): Latest publication date. Defaults to None.
+            agency (str, optional): Case-insensitive text in agency or parent agency names. Defaults to None.
+            document_type (str, optional): Document type, e.g. "Rule" or "Proposed Rule" (case-insensitive). Defaults to None.
+            significant (int, optional): Value of "significant" (0 or 1). Defaults to None.
+            f1_significant (int, optional): Value of "3f1_significant" (0 or 1). Defaults to None.
+
+        Returns:
+            pl.DataFrame: Matching documents sorted by publication date and document number.
+        """
+        df = self.read(start_date, end_date)
+        lf = df.lazy()
+        if agency:
+            agency_cols = [c for c in ("agency_names", "parent_agency_names") if c in df.columns]
+            if not agency_cols:
+                return df.clear()
+            lf = lf.filter(pl.any_horizontal(pl.col(c).cast(pl.String).str.to_lowercase().str.contains(agency.lower(), literal=True) for c in agency_cols))
+        if document_type:
+            if "type" not in df.columns:
+                return df.clear()
+            lf = lf.filter(pl.col("type").cast(pl.String).str.to_lowercase() == document_type.lower())
+        for column, value in (("significant", significant), ("3f1_significant", f1_significant)):
+            if value is not None:
+                if column not in df.columns:
+                    return df.clear()
+                lf = lf.filter(pl.col(column).cast(pl.Float64, strict=False) == float(value))
+        return lf.sort(["publication_date", "document_number"]).collect()
@@ -2,6 +2,7 @@
 Filters for flagging and removing routine actions from output.
 The regex patterns are passed with the re.IGNORECASE flag, so case doesn't affect the output.
 Many are in Title Case for clarity for human readers.
+Before committing changes, check for slow (backtracking) patterns with: python -m regdigest.modules.pattern_performance
 
 Contributors: @mfebrizio, @pateldevenr
 Last revised: 2024-06-28
@@ -7,6 +7,7 @@ Created: 2022-06-13
 Last modified: 2024-06-07
 """
 # dependencies
+from contextlib import nullcontext
 from datetime import date
 import functools
 import logging
@@ -18,7 +19,7 @@ from fr_toolbelt.api_requests import (
     get_documents_by_number, 
     parse_document_numbers, 
     )
-from fr_toolbelt.preprocessing import AgencyMetadata, AgencyData, RegInfoData
+from fr_toolbelt.preprocessing import AgencyMetadata, AgencyData
 from pandas import DataFrame
 
 try:  # for use as module: python -m regdigest
@@ -26,6 +27,9 @@ try:  # for use as module: python -m regdigest
         filter_corrections, 
         filter_actions, 
         get_significant_info, 
+        use_cassette, 
+        RinCache, 
+        SearchIndex, 
         )
     from .regex_filters import FILTER_ROUTINE
 except ImportError:
@@ -34,6 +38,9 @@ except ImportError:
         filter_corrections, 
         filter_actions, 
         get_significant_info, 
+        use_cassette, 
+        RinCache, 
+        SearchIndex, 
         )
     from regex_filters import FILTER_ROUTINE
 
@@ -54,6 +61,10 @@ FIELDS = (
     'correction_of', 
     )
 
+# full-text index of retrieved documents and parsed RIN info, saved in the output directory
+SEARCH_INDEX_FILE = "search_index.json.gz"
+RIN_CACHE_FILE = "rin_cache.json"
+
 
 # -- utils -- #
 
@@ -127,16 +138,47 @@ def retrieve_documents(
         end_date: str | date = None, 
         input_path: Path = None, 
         test_filters: bool = False,
+        cassette_path: Path = None, 
+        cassette_mode: str = "replay", 
+        search_index: SearchIndex = None, 
+        rin_cache: RinCache = None, 
     ):
     """Main pipeline for retrieving Federal Register documents.
 
     Args:
-        metadata (dict): Agency metadata for cleaning agency names.
+        start_date (str | date, optional): Start of date range. Defaults to today.
+        end_date (str | date, optional): End of date range. Defaults to None.
         input_path (Path, optional): Path to input with documents to retrieve. Defaults to None.
+        test_filters (bool, optional): Return the documents flagged by the filters instead. Defaults to False.
+        cassette_path (Path, optional): Directory of recorded HTTP responses; when supplied, requests go through the cassette. Defaults to None.
+        cassette_mode (str, optional): Cassette mode ("replay", "record", or "auto"). Defaults to "replay".
+        search_index (SearchIndex, optional): Index to update with the output documents. Defaults to None.
+        rin_cache (RinCache, optional): Cache of parsed RIN info to reuse and update. Defaults to None (cache for this run only).
 
     Returns:
         DataFrame: Output data.
     """
+    if cassette_path is not None:
+        cassette = use_cassette(cassette_path, mode=cassette_mode)
+    else:
+        cassette = nullcontext()
+    
+    with cassette:
+        df = _retrieve_documents(start_date, end_date, input_path, test_filters, rin_cache)
+    
+    if search_index is not None and df is not None and not test_filters:
+        search_index.add_documents(df.reset_index().to_dict("records"))
+    return df
+
+
+def _retrieve_documents(
+        start_date: str | date = None, 
+        end_date: str | date = None, 
+        input_path: Path = None, 
+        test_filters: bool = False,
+        rin_cache: RinCache = None, 
+    ):
+    """Run the retrieval pipeline; see `retrieve_documents`."""
     if input_path is None:  # date range
         if start_date is None:
             start_date = f"{date.today()}"
@@ -157,7 +199,9 @@ def retrieve_documents(
     metadata, schema = AgencyMetadata().get_agency_metadata()
     results = AgencyData(results, metadata, schema, field_keys=("agencies", "agency_names")).process_data(return_format = "name")
     results = [r | {"agency_names": "; ".join([metadata.get(a).get("name", "") for a in r.get("agency_slugs", "")])} for r in results]
-    results = RegInfoData(results).process_data()
+    if rin_cache is None:
+        rin_cache = RinCache()
+    results = rin_cache.process_data(results)
     
     df = DataFrame(results)
     df, _ = filter_corrections(df)
@@ -201,6 +245,9 @@ def main():
     """
     # loop for getting inputs, calling main pipeline function, and saving data
     # won't break until it receives valid input
+    [output_dir] = create_paths()
+    search_index = SearchIndex.load(output_dir / SEARCH_INDEX_FILE)
+    rin_cache = RinCache.load(output_dir / RIN_CACHE_FILE)
     while True:
         # print prompt to console
         get_input = input("Use input file containing document numbers or urls? [yes/no]: ")
@@ -208,7 +255,7 @@ def main():
         # check user inputs
         if get_input.lower() in ("y", "yes"):
             output_dir, input_dir = create_paths(input_file=True)
-            df = retrieve_documents(input_path=input_dir)
+            df = retrieve_documents(input_path=input_dir, search_index=search_index, rin_cache=rin_cache)
             break
         elif get_input.lower() in ("n", "no"):
             [output_dir] = create_paths()
@@ -220,7 +267,7 @@ def main():
                 match_2 = re.fullmatch(pattern, end_date, flags=re.I)
                 if match_1 and (match_2 or end_date==""):
                     #print(type(end_date), f"{end_date=}", len(end_date), sep=r" | ")
-                    df = retrieve_documents(start_date=start_date, end_date=end_date)
+                    df = retrieve_documents(start_date=start_date, end_date=end_date, search_index=search_index, rin_cache=rin_cache)
                     break
                 else:
                     print("Invalid input. Must enter dates in format 'yyyy-mm-dd'.")
@@ -230,6 +277,8 @@ def main():
     
     if df is not None:
         export_data(df, output_dir)
+        search_index.save_changes(output_dir / SEARCH_INDEX_FILE)
+        rin_cache.save(output_dir / RIN_CACHE_FILE)
 
 
 if __name__ == "__main__":
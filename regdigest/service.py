@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Local read-only HTTP/JSON service over processed Regulation Digest documents.
+Retrieves missing dates with the same pipeline, keeps them in a local store, and answers queries from the store.
+
+Usage:
+    python -m regdigest.service --port 8000
+
+Example request:
+    GET /documents?start_date=2024-06-01&end_date=2024-06-30&agency=environmental&type=rule&significant=1&page=1&per_page=100
+"""
+import argparse
+from datetime import date
+from functools import lru_cache
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from math import ceil
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+try:  # for use as module: python -m regdigest.service
+    from .modules import DigestStore
+    from .retrieve_documents import retrieve_documents
+except ImportError:
+    # hacky but allows alternate script to work
+    from modules import DigestStore
+    from retrieve_documents import retrieve_documents
+
+DEFAULT_STORE_PATH = Path(__file__).parents[1] / "output" / "store"
+QUERY_PARAMS = ("start_date", "end_date", "agency", "type", "significant", "3f1_significant", "page", "per_page")
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 1000
+
+
+class QueryParamError(Exception):
+    pass
+
+
+class RetrievalError(Exception):
+    pass
+
+
+def parse_query_params(query: str) -> dict:
+    """Validate query string parameters and fill in defaults.
+
+    Raises:
+        QueryParamError: Unknown parameter or invalid value.
+
+    Returns:
+        dict: Normalized parameters.
+    """
+    raw = {k: v[-1] for k, v in parse_qs(query).items()}
+    unknown = set(raw) - set(QUERY_PARAMS)
+    if unknown:
+        raise QueryParamError(f"Unknown parameter(s): {', '.join(sorted(unknown))}.")
+
+    params = {k: raw.get(k) or None for k in QUERY_PARAMS}
+    try:
+        params["end_date"] = f"{date.fromisoformat(params['end_date'] or f'{date.today()}')}"
+        params["start_date"] = f"{date.fromisoformat(params['start_date'] or params['end_date'])}"
+        params["page"] = int(params["page"] or 1)
+        params["per_page"] = int(params["per_page"] or DEFAULT_PER_PAGE)
+        for k in ("significant", "3f1_significant"):
+            if params[k] is not None:
+                params[k] = int(params[k])
+    except ValueError as err:
+        raise QueryParamError(f"Invalid parameter value ({err}). Dates must be yyyy-mm-dd; other numeric values must be integers.")
+
+    if params["start_date"] > params["end_date"]:
+        raise QueryParamError("Parameter 'start_date' must be on or before 'end_date'.")
+    if params["page"] < 1 or not 1 <= params["per_page"] <= MAX_PER_PAGE:
+        raise QueryParamError(f"Parameter 'page' must be at least 1 and 'per_page' between 1 and {MAX_PER_PAGE}.")
+    return params
+
+
+class DigestService:
+    """Answers document queries from a `DigestStore`, retrieving uncovered dates with `retrieve_documents`.
+
+    Args:
+        store (DigestStore): Local store of processed documents.
+        offline (bool, optional): Only serve stored documents; never run the pipeline. Defaults to False.
+        cache_size (int, optional): Number of query responses to keep in memory. Defaults to 256.
+        cassette_path (Path, optional): Directory of recorded HTTP responses for the pipeline (see `use_cassette`). Defaults to None.
+        cassette_mode (str, optional): Cassette mode ("replay", "record", or "auto"). Defaults to "replay".
+    """
+    def __init__(
+            self, 
+            store: DigestStore, 
+            offline: bool = False, 
+            cache_size: int = 256, 
+            cassette_path: Path = None, 
+            cassette_mode: str = "replay", 
+        ) -> None:
+        self.store = store
+        self.offline = offline
+        self.cassette_path = cassette_path
+        self.cassette_mode = cassette_mode
+        # responses are cached per store version, so new data invalidates them
+        self.respond = lru_cache(maxsize=cache_size)(self._respond)
+
+    def fill(self, start_date: str, end_date: str) -> None:
+        """Run the pipeline for dates in the range that aren't in the store yet or are due for a refresh (see `DigestStore`).
+
+        Raises:
+            RetrievalError: The pipeline failed; dates retrieved before the failure stay in the store.
+        """
+        # covered ranges are answered without waiting for a retrieval in another thread
+        if self.offline or not self.store.missing_ranges(start_date, end_date):
+            return
+        with self.store.lock:
+            # another thread may have retrieved the dates while this one waited
+            for start, end in self.store.missing_ranges(start_date, end_date):
+                try:
+                    df = retrieve_documents(start, end, cassette_path=self.cassette_path, cassette_mode=self.cassette_mode)
+                except Exception as err:
+                    raise RetrievalError(f"Could not retrieve documents from {start} to {end}: {err!r}") from err
+                self.store.write(df, start, end)
+
+    def _respond(self, version: int, query: tuple) -> tuple[bytes, str]:
+        params = dict(query)
+        df = self.store.query(
+            start_date=params["start_date"],
+            end_date=params["end_date"],
+            agency=params["agency"],
+            document_type=params["type"],
+            significant=params["significant"],
+            f1_significant=params["3f1_significant"],
+            )
+        page, per_page = params["page"], params["per_page"]
+        body = {
+            "count": df.height,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": ceil(df.height / per_page),
+            "results": df.slice((page - 1) * per_page, per_page).to_dicts(),
+            }
+        content = json.dumps(body, default=str).encode("utf-8")
+        etag = f'"{hashlib.sha1(content).hexdigest()}"'
+        return content, etag
+
+    def get_documents(self, query: str) -> tuple[bytes, str]:
+        """Return the JSON body and ETag for a /documents query string."""
+        params = parse_query_params(query)
+        self.fill(params["start_date"], params["end_date"])
+        return self.respond(self.store.version, tuple(params.items()))
+
+
+class DigestRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET requests; the service is attached to the server as `server.service`."""
+
+    def _send(self, status: int, content: bytes = b"", etag: str = None) -> None:
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if content:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/documents":
+            self._error(404, "Not found. Use /documents.")
+            return
+        try:
+            content, etag = self.server.service.get_documents(url.query)
+        except QueryParamError as err:
+            self._error(400, f"{err}")
+            return
+        except RetrievalError as err:
+            self.log_error("%s", err)
+            self._error(502, f"{err}")
+            return
+        except Exception as err:
+            self.log_error("%r", err)
+            self._error(500, "Internal server error.")
+            return
+
+        # conditional GET: nothing to send if the client's copy is current
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self._send(304, etag=etag)
+        else:
+            self._send(200, content, etag=etag)
+
+
+def create_server(
+        store_path: Path = DEFAULT_STORE_PATH, 
+        host: str = "127.0.0.1", 
+        port: int = 8000, 
+        offline: bool = False, 
+        cassette_path: Path = None, 
+        cassette_mode: str = "replay", 
+    ):
+    """Create the HTTP server; call `serve_forever()` on the result to start it."""
+    server = ThreadingHTTPServer((host, port), DigestRequestHandler)
+    server.service = DigestService(DigestStore(store_path), offline=offline, cassette_path=cassette_path, cassette_mode=cassette_mode)
+    return server
+
+
+def main():
+    """Command-line interface for running the query service.
+    """
+    parser = argparse.ArgumentParser(description="Serve processed Federal Register documents as JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH, help="Directory of the local document store.")
+    parser.add_argument("--offline", action="store_true", help="Only serve stored documents.")
+    parser.add_argument("--cassette", type=Path, default=None, help="Directory of recorded HTTP responses for the pipeline.")
+    parser.add_argument("--cassette-mode", choices=("replay", "record", "auto"), default="replay")
+    args = parser.parse_args()
+
+    server = create_server(args.store, args.host, args.port, args.offline, args.cassette, args.cassette_mode)
+    print(f"Serving documents at http://{args.host}:{server.server_port}/documents")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+
+    main()
@@ -1,15 +1,35 @@
+from datetime import date, timedelta
+from functools import cache
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from pprint import pprint
+from tempfile import TemporaryDirectory
+from threading import Thread
+import time
 
-from requests import get
+from fr_toolbelt.preprocessing import RegInfoData
+from pandas import DataFrame
+from requests import Request, Response, Session, get
 
 from regdigest.modules import *
+from regdigest.modules import Cassette, CassetteError, DigestStore, RinCache, SearchIndex, filter_actions, filter_corrections, merge_results, query_page, to_grid_frame, use_cassette
+from regdigest.modules import filters as filters_module
+from regdigest.modules import search_index as search_index_module
+from regdigest.modules.pattern_performance import TITLE_LENGTHS, PatternPerformanceError, check_patterns
+from regdigest.regex_filters import FILTER_ROUTINE
+from regdigest.retrieve_documents import FIELDS, retrieve_documents
+from regdigest.service import create_server
 
 
 # TEST OBJECTS AND UTILS #
 
 TESTS_PATH = Path(__file__).parent
 
+# recorded API responses; set mode to "record" (with network access) to create or refresh them
+CASSETTE_PATH = TESTS_PATH / "cassettes"
+CASSETTE_MODE = "replay"
+
 ENDPOINT_URL = r"https://www.federalregister.gov/api/v1/documents.json?"
 
 TEST_PARAMS_FULL = {
@@ -19,7 +39,6 @@ TEST_PARAMS_FULL = {
     "conditions[publication_date][gte]": "2023-11-01", 
     "conditions[publication_date][lte]": "2023-11-30"
     }
-TEST_RESPONSE_FULL = get(ENDPOINT_URL, TEST_PARAMS_FULL).json()
 
 TEST_PARAMS_PARTIAL = {
     "per_page": 1000, 
@@ -28,17 +47,475 @@ TEST_PARAMS_PARTIAL = {
     "conditions[publication_date][gte]": "2023-01-01", 
     "conditions[publication_date][lte]": "2023-06-30"
     }
-TEST_URL_PARTIAL = get(ENDPOINT_URL, TEST_PARAMS_PARTIAL).url
-TEST_RESPONSE_PARTIAL = get(ENDPOINT_URL, TEST_PARAMS_PARTIAL).json()
-TEST_COUNT_PARTIAL = TEST_RESPONSE_PARTIAL["count"]
 
 
-# retrieve_documents #
+# API responses are requested when a helper is first called, not at import, so tests that don't use them run offline.
+# No recording is committed: call a helper once with CASSETTE_MODE = "record" (and network access) to create it.
+
+
+@cache
+def get_test_response(params: tuple):
+    with use_cassette(CASSETTE_PATH, mode=CASSETTE_MODE):
+        return get(ENDPOINT_URL, dict(params))
+
+
+def get_response_full() -> dict:
+    return get_test_response(tuple(TEST_PARAMS_FULL.items())).json()
+
+
+def get_url_partial() -> str:
+    return get_test_response(tuple(TEST_PARAMS_PARTIAL.items())).url
+
+
+def get_response_partial() -> dict:
+    return get_test_response(tuple(TEST_PARAMS_PARTIAL.items())).json()
+
+
+def get_count_partial() -> int:
+    return get_response_partial()["count"]
+
+
+class _StaticHandler(BaseHTTPRequestHandler):
+    """Serves the same bytes for every path so cassettes can be tested without the live API."""
+    body = b'{"count": 2, "results": [{"title": "caf\xc3\xa9"}, {"title": "b"}]}'
+
+    def do_GET(self):
+        if "unavailable" in self.path:
+            self.send_response(503)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StaticHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# cassette #
+
+
+def test_cassette_record_replay():
+    server = _local_server()
+    url = f"http://127.0.0.1:{server.server_port}/documents.json"
+    with TemporaryDirectory() as tmp:
+        with use_cassette(tmp, mode="record") as cassette:
+            recorded = get(url, {"b": 2, "a": 1})
+            # errors aren't recorded, so they aren't replayed later
+            assert get(url.replace("documents", "unavailable")).status_code == 503
+        server.shutdown()
+        server.server_close()
+        assert cassette.recorded == 1
+
+        # server is down, so responses must come from disk; parameter order doesn't matter
+        with use_cassette(tmp, mode="replay") as cassette:
+            replayed = get(url, {"a": 1, "b": 2})
+        assert cassette.hits == 1
+        assert replayed.content == recorded.content == _StaticHandler.body
+        assert replayed.status_code == 200
+        assert replayed.json() == recorded.json()
+
+        try:
+            with use_cassette(tmp, mode="replay"):
+                get(url, {"a": 3})
+        except CassetteError:
+            pass
+        else:
+            raise AssertionError("Expected CassetteError for unrecorded request.")
+    
+    # a cassette only captures requests from its own thread, and overlapping blocks restore the original send
+    send = Session.send
+    server = _local_server()
+    url = f"http://127.0.0.1:{server.server_port}/documents.json"
+    with TemporaryDirectory() as tmp:
+        statuses = []
+        with use_cassette(tmp, mode="replay"):
+            other = Thread(target=lambda: statuses.append(get(url).status_code))
+            other.start()
+            other.join()
+            nested = use_cassette(Path(tmp) / "nested", mode="replay")
+            nested.__enter__()
+        nested.__exit__(None, None, None)
+        assert statuses == [200]
+    server.shutdown()
+    server.server_close()
+    assert Session.send is send
+
+
+def write_cassette_entry(path: Path, url: str, body: bytes, params: dict = None):
+    """Save a fixed response for a GET request to a cassette."""
+    request = Request("GET", url, params=params).prepare()
+    response = Response()
+    response.status_code, response.reason, response.url = 200, "OK", request.url
+    response._content = body
+    Cassette(path).save(request, response)
+
+
+def write_pipeline_cassette(path: Path, start_date: str, end_date: str):
+    """Cassette with the three responses `retrieve_documents` needs for a date range: documents, agencies, and fr_tracking."""
+    documents = [
+        {"document_number": "2024-00001", "publication_date": "2024-01-02", "title": "National Emission Standards for Hazardous Air Pollutants", "type": "Rule", "action": "Final rule."}, 
+        {"document_number": "2024-00002", "publication_date": "2024-01-03", "title": "Energy Conservation Standards for Furnaces", "type": "Proposed Rule", "action": "Proposed rule."}, 
+        {"document_number": "2024-00003", "publication_date": "2024-01-03", "title": "Energy Conservation Standards; Correction", "type": "Rule", "action": "Final rule; correction.", "correction_of": "2023-99999"}, 
+        ]
+    for n, doc in enumerate(documents):
+        doc.update({
+            "agency_names": ["Environmental Protection Agency"] if n == 0 else ["Energy Department"], 
+            "agencies": [{"slug": "environmental-protection-agency"}] if n == 0 else [{"slug": "energy-department"}], 
+            "citation": f"89 FR {100 + n}", "start_page": 100 + n, "end_page": 100 + n, 
+            "html_url": f"https://www.federalregister.gov/d/{doc['document_number']}", "pdf_url": "", 
+            "regulation_id_number_info": {} if n == 0 else {"1904-AD11": {"priority_category": "Economically Significant", "issue": "202310"}}, 
+            })
+        doc.setdefault("correction_of", None)
+    params = {"per_page": 1000, "page": 0, "order": "oldest", "conditions[publication_date][gte]": start_date, "conditions[publication_date][lte]": end_date, "fields[]": FIELDS}
+    write_cassette_entry(path, ENDPOINT_URL, json.dumps({"count": 3, "total_pages": 1, "results": documents}).encode("utf-8"), params)
+    
+    agencies = [
+        {"id": 145, "slug": "environmental-protection-agency", "name": "Environmental Protection Agency", "parent_id": None}, 
+        {"id": 136, "slug": "energy-department", "name": "Energy Department", "parent_id": None}, 
+        ]
+    write_cassette_entry(path, r"https://www.federalregister.gov/api/v1/agencies.json", json.dumps(agencies).encode("utf-8"))
+    
+    tracking = "document_number,significant,econ_significant,3(f)(1) significant,Major\n2024-00001,0,,0,0\n2024-00002,1,,1,0\n"
+    write_cassette_entry(path, r"https://raw.githubusercontent.com/regulatorystudies/Reg-Stats/main/data/fr_tracking/fr_tracking.csv", tracking.encode("utf-8"))
+
+
+def test_retrieve_documents_replay():
+    with TemporaryDirectory() as tmp:
+        write_pipeline_cassette(Path(tmp), "2024-01-01", "2024-01-05")
+        df = retrieve_documents("2024-01-01", "2024-01-05", cassette_path=Path(tmp), cassette_mode="replay")
+    
+    # correction filtered out; agencies and significance merged from replayed responses
+    assert df.index.to_list() == ["2024-00001", "2024-00002"]
+    assert df["agency_names"].to_list() == ["Environmental Protection Agency", "Energy Department"]
+    assert df["significant"].to_list() == [0, 1]
+    assert df.loc["2024-00002", "rin"] == "1904-AD11"
+
+
+# filters #
+
+
+def test_filter_actions_parallel():
+    df = DataFrame({
+        "document_number": ["2024-00001", "2024-00002", "C1-2024-00003", "2024-00004", "2024-00005"] * 20, 
+        "title": ["Sunshine Act Meetings", "Air Plan Approval; Ohio", "Energy Conservation Standards", None, "Privacy Act of 1974"] * 20, 
+        "action": ["Notice", "Final rule; correction", "Proposed rule", "Rule", None] * 20, 
+        "correction_of": [None] * 100, 
+        })
+    kept, flagged = filter_actions(df, filters=FILTER_ROUTINE, columns=["title"], parallel=False)
+    kept_p, flagged_p = filter_actions(df, filters=FILTER_ROUTINE, columns=["title"], parallel=True)
+    assert kept.equals(kept_p) and flagged.equals(flagged_p)
+    assert len(flagged) == 60
+    pool = filters_module._POOL
+    
+    kept, corrections = filter_corrections(df, parallel=False)
+    kept_p, corrections_p = filter_corrections(df, parallel=True)
+    assert kept.equals(kept_p) and corrections.equals(corrections_p)
+    assert len(corrections) == 40
+    
+    # one pool is shared across calls
+    assert pool is not None and filters_module._POOL is pool
+    filters_module.shutdown_pool()
+    
+    # automatic mode doesn't start a pool with a single CPU
+    threshold, cpu_count = filters_module.PARALLEL_THRESHOLD, filters_module.os.cpu_count
+    filters_module.PARALLEL_THRESHOLD, filters_module.os.cpu_count = 1, lambda: 1
+    try:
+        filter_corrections(df)
+        assert filters_module._POOL is None
+    finally:
+        filters_module.PARALLEL_THRESHOLD, filters_module.os.cpu_count = threshold, cpu_count
+
+
+def test_filter_patterns_performance():
+    # fails when a pattern in FILTER_ROUTINE exceeds the per-pattern time budget
+    check_patterns(FILTER_ROUTINE)
+    
+    try:
+        check_patterns([r"Notice.*of.*Meeting.*Vessel"])
+    except PatternPerformanceError:
+        pass
+    else:
+        raise AssertionError("Expected PatternPerformanceError for backtracking pattern.")
+    
+    # catastrophic patterns are stopped at the timeout instead of hanging; near misses catch nested quantifiers
+    for pattern, lengths in ((r"(\w+\s?)+Vessel", (25, 50)), (r"(a+)+$", TITLE_LENGTHS)):
+        start = time.perf_counter()
+        try:
+            check_patterns([pattern], lengths=lengths, timeout=2)
+        except PatternPerformanceError:
+            pass
+        else:
+            raise AssertionError(f"Expected PatternPerformanceError for {pattern}.")
+        assert time.perf_counter() - start < 10
+
+
+# grid #
+
+
+def test_query_page():
+    df = DataFrame({
+        "publication_date": [f"2024-01-{d:02}" for d in range(1, 31)], 
+        "title": [f"Rule {d}" if d % 3 else f"Notice {d}" for d in range(1, 31)], 
+        "significant": [d % 2 for d in range(1, 31)], 
+        "extra": range(30), 
+        })
+    grid = to_grid_frame(df, ["publication_date", "title", "significant"])
+    assert grid.columns == ["publication_date", "title", "significant"]
+    
+    page, total = query_page(grid, filters={"title": "notice"}, sort_by="publication_date", descending=True, page=1, page_size=4)
+    assert total == 10
+    assert page["title"].to_list() == ["Notice 30", "Notice 27", "Notice 24", "Notice 21"]
+    
+    # out-of-range pages are clamped to the last page
+    page, _ = query_page(grid, filters={"title": "notice"}, page=99, page_size=4)
+    assert page["title"].to_list() == ["Notice 27", "Notice 30"]
+    
+    page, total = query_page(to_grid_frame(DataFrame(columns=["title"])), filters={"title": "x"})
+    assert total == 0 and page.height == 0
+
+
+# search index #
+
+
+def test_search_index():
+    index = SearchIndex()
+    added = index.add_documents([
+        {"document_number": "2024-00001", "publication_date": "2024-01-02", "title": "Air Plan Approval; Ohio", "action": "Final rule.", "agency_names": "Environmental Protection Agency"}, 
+        {"document_number": "2024-00002", "publication_date": "2024-01-03", "title": "Approval of Air Quality Plan", "action": "Proposed rule.", "agency_names": "Environmental Protection Agency"}, 
+        {"document_number": "2024-00003", "publication_date": "2024-01-04", "title": "Ohio River Safety Zone", "action": "Temporary final rule.", "agency_names": "Coast Guard"}, 
+        ])
+    assert added == 3
+    assert [r["document_number"] for r in index.search("ohio")] == ["2024-00003", "2024-00001"]
+    assert [r["document_number"] for r in index.search('"air plan"')] == ["2024-00001"]
+    assert [r["document_number"] for r in index.search('"final rule" ohio', end_date="2024-01-03")] == ["2024-00001"]
+    # phrases don't span fields
+    assert index.search('"ohio final"') == []
+    
+    # re-adding a changed document replaces its postings
+    index.add_documents([{"document_number": "2024-00003", "publication_date": "2024-01-04", "title": "Safety Zone; Lake Erie", "action": "Temporary final rule.", "agency_names": "Coast Guard"}])
+    assert [r["document_number"] for r in index.search("ohio")] == ["2024-00001"]
+    
+    with TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.json.gz"
+        index.save(path)
+        loaded = SearchIndex.load(path)
+        assert len(loaded) == 3 and loaded.search("erie") == index.search("erie")
+        
+        # later changes are appended to the journal and replayed on load
+        index.add_documents([{"document_number": "2024-00004", "publication_date": "2024-01-05", "title": "Lake Erie Fisheries", "action": "Notice.", "agency_names": "Fish and Wildlife Service"}])
+        index.save_changes(path)
+        assert index.pending == [] and path.with_name(f"{path.name}.journal").exists()
+        loaded = SearchIndex.load(path)
+        assert len(loaded) == 4 and loaded.search("erie") == index.search("erie")
+        
+        # a full save compacts the journal
+        index.save(path)
+        assert not path.with_name(f"{path.name}.journal").exists()
+        assert SearchIndex.load(path).search("erie") == index.search("erie")
+        
+        # compaction rebuilds from disk, keeping documents journaled by another instance after this one loaded
+        first, second = SearchIndex.load(path), SearchIndex.load(path)
+        first.add_documents([{"document_number": "2024-00005", "publication_date": "2024-01-08", "title": "Alpha Rule"}])
+        first.save_changes(path)
+        second.add_documents([{"document_number": "2024-00006", "publication_date": "2024-01-09", "title": "Beta Rule"}])
+        second.save_changes(path)
+        second.compact(path)
+        loaded = SearchIndex.load(path)
+        assert len(loaded) == 6 and len(second) == 6
+        assert [r["document_number"] for r in loaded.search("alpha")] == ["2024-00005"]
+        assert [r["document_number"] for r in loaded.search("beta")] == ["2024-00006"]
+        
+        # the on-disk journal size triggers compaction, whichever instance wrote it
+        compact_size, search_index_module.COMPACT_SIZE = search_index_module.COMPACT_SIZE, 1
+        try:
+            first.add_documents([{"document_number": "2024-00007", "publication_date": "2024-01-10", "title": "Gamma Rule"}])
+            first.save_changes(path)
+        finally:
+            search_index_module.COMPACT_SIZE = compact_size
+        assert not path.with_name(f"{path.name}.journal").exists()
+        assert len(SearchIndex.load(path)) == 7
+
+
+# rin cache #
+
+
+def test_rin_cache():
+    rin_a = {"2060-AV09": {"priority_category": "Economically Significant", "issue": "202310"}}
+    rin_b = {"0648-BM42": {"priority_category": "Other Significant", "issue": "202404"}, "0648-BM43": None}
+    documents = [
+        {"document_number": "2024-00001", "regulation_id_number_info": rin_a}, 
+        {"document_number": "2024-00002", "regulation_id_number_info": {}}, 
+        {"document_number": "2024-00003", "regulation_id_number_info": rin_b}, 
+        {"document_number": "2024-00004", "regulation_id_number_info": dict(rin_a)}, 
+        {"document_number": "2024-00005"}, 
+        ]
+    cache = RinCache()
+    assert cache.process_data(documents) == RegInfoData(documents).process_data()
+    assert cache.misses == 3
+    
+    # entries are reused across runs; only changed payloads are processed
+    with TemporaryDirectory() as tmp:
+        cache.save(Path(tmp) / "rin_cache.json")
+        cache = RinCache.load(Path(tmp) / "rin_cache.json")
+    changed = documents + [{"document_number": "2024-00006", "regulation_id_number_info": {"2060-AV09": {"priority_category": "Other Significant", "issue": "202404"}}}]
+    assert cache.process_data(changed) == RegInfoData(changed).process_data()
+    assert cache.misses == 1
+    
+    # payloads with the same RINs in a different order can have different results
+    reordered = [
+        {"document_number": "2024-00007", "regulation_id_number_info": {"1018-BH01": None, "1018-BH02": {"priority_category": "Other Significant", "issue": "202404"}}}, 
+        {"document_number": "2024-00008", "regulation_id_number_info": {"1018-BH02": {"priority_category": "Other Significant", "issue": "202404"}, "1018-BH01": None}}, 
+        ]
+    assert cache.process_data(reordered) == RegInfoData(reordered).process_data()
+    assert cache.misses == 3
+    
+    # caches saving to the same file keep each other's entries
+    with TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rin_cache.json"
+        first, second = RinCache.load(path), RinCache.load(path)
+        first.process_data(documents)
+        first.save(path)
+        second.process_data(reordered)
+        second.save(path)
+        loaded = RinCache.load(path)
+        assert len(first) == 3 and len(loaded) == 5 and set(first.entries) <= set(loaded.entries)
+
+
+# store and service #
+
+
+def sample_digest():
+    return DataFrame({
+        "document_number": ["2024-00001", "2024-00002", "2024-00003", "2024-00004"], 
+        "publication_date": ["2024-01-02", "2024-01-02", "2024-01-03", "2024-01-05"], 
+        "agency_names": ["Environmental Protection Agency", "Coast Guard", "Environmental Protection Agency", "Food and Drug Administration"], 
+        "parent_agency_names": ["Environmental Protection Agency", "Homeland Security Department", "Environmental Protection Agency", "Health and Human Services Department"], 
+        "title": ["Air Plan Approval; Ohio", "Safety Zone; Lake Erie", "Energy Standards", "Food Labeling"], 
+        "type": ["Rule", "Rule", "Proposed Rule", "Rule"], 
+        "significant": [0, 0, 1, None], 
+        "3f1_significant": [0, 0, 1, None], 
+        }).set_index("document_number")
+
+
+def test_digest_store():
+    with TemporaryDirectory() as tmp:
+        store = DigestStore(tmp)
+        assert store.missing_ranges("2024-01-01", "2024-01-03") == [("2024-01-01", "2024-01-03")]
+        store.write(sample_digest(), "2024-01-02", "2024-01-05")
+        
+        store = DigestStore(tmp)  # reload from disk
+        assert store.missing_ranges("2024-01-01", "2024-01-07") == [("2024-01-01", "2024-01-01"), ("2024-01-06", "2024-01-07")]
+        assert [p.stem for p in store.partitions("2024-01-03")] == ["2024-01-03", "2024-01-05"]
+        assert store.query(agency="environmental")["document_number"].to_list() == ["2024-00001", "2024-00003"]
+        assert store.query(document_type="rule", end_date="2024-01-04")["document_number"].to_list() == ["2024-00001", "2024-00002"]
+        assert store.query(significant=1, f1_significant=1)["document_number"].to_list() == ["2024-00003"]
+        
+        # rewriting the same documents doesn't change the version, so cached responses stay valid
+        version = store.version
+        store.write(sample_digest(), "2024-01-02", "2024-01-05")
+        assert store.version == version
+        
+        # today and later are retrieved again once the refresh interval has passed
+        today, tomorrow = date.today(), date.today() + timedelta(days=1)
+        store.write(None, today - timedelta(days=1), tomorrow)
+        assert store.missing_ranges(today - timedelta(days=1), tomorrow) == []
+        assert DigestStore(tmp, refresh_interval=timedelta(0)).missing_ranges(today - timedelta(days=1), tomorrow) == [(f"{today}", f"{tomorrow}")]
+
+
+def test_merge_results():
+    weekly = sample_digest()
+    catch_up = sample_digest().loc[["2024-00003", "2024-00004"]].copy()
+    catch_up.loc["2024-00003", "significant"] = 0
+    catch_up.loc["2024-00004", ["significant", "3f1_significant"]] = 1
+    catch_up.loc["2024-00004", "title"] = "Food Labeling; Nutrient Content Claims"
+    input_file = sample_digest().loc[["2024-00004"]].reset_index()  # older data, as a column
+    
+    merged = merge_results(input_file, weekly, catch_up)
+    assert merged.index.to_list() == ["2024-00001", "2024-00002", "2024-00003", "2024-00004"]
+    assert merged.loc["2024-00003", "significant"] == 0 and merged.loc["2024-00003", "3f1_significant"] == 1
+    assert merged.loc["2024-00004", "significant"] == 1
+    assert merged.loc["2024-00004", "title"] == "Food Labeling; Nutrient Content Claims"
+    
+    # newest by priority rather than position; missing values don't overwrite older ones
+    merged = merge_results(catch_up, weekly, priority=["2024-02-01", "2024-01-08"])
+    assert merged.loc["2024-00003", "significant"] == 0
+    assert merged.loc["2024-00004", "significant"] == 1
+    assert merged.loc["2024-00001"].equals(weekly.loc["2024-00001"])
+    
+    # overlapping store writes merge into existing partitions
+    with TemporaryDirectory() as tmp:
+        store = DigestStore(tmp)
+        store.write(weekly, "2024-01-02", "2024-01-05")
+        store.write(catch_up, "2024-01-03", "2024-01-05")
+        stored = store.query()
+        assert stored["document_number"].to_list() == ["2024-00001", "2024-00002", "2024-00003", "2024-00004"]
+        assert stored["significant"].to_list() == [0, 0, 0, 1]
+
+
+def test_service():
+    with TemporaryDirectory() as tmp:
+        DigestStore(tmp).write(sample_digest(), "2024-01-02", "2024-01-05")
+        server = create_server(Path(tmp), port=0, offline=True)
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/documents"
+        try:
+            response = get(url, {"start_date": "2024-01-01", "end_date": "2024-01-31", "type": "rule", "per_page": 2, "page": 2})
+            assert response.status_code == 200
+            body = response.json()
+            assert (body["count"], body["total_pages"]) == (3, 2)
+            assert [r["document_number"] for r in body["results"]] == ["2024-00004"]
+            
+            # conditional GET
+            etag = response.headers["ETag"]
+            response = get(url, {"start_date": "2024-01-01", "end_date": "2024-01-31", "type": "rule", "per_page": 2, "page": 2}, headers={"If-None-Match": etag})
+            assert response.status_code == 304 and response.content == b""
+            
+            assert get(url, {"start_date": "January 1"}).status_code == 400
+            assert get(url, {"color": "red"}).status_code == 400
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    # pipeline failures return a JSON error instead of dropping the connection
+    with TemporaryDirectory() as tmp:
+        # the cassette has no recordings, so every API request fails
+        server = create_server(Path(tmp) / "store", port=0, cassette_path=Path(tmp) / "cassettes", cassette_mode="replay")
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/documents"
+        try:
+            response = get(url, {"start_date": "2024-01-01", "end_date": "2024-01-05"})
+            assert response.status_code == 502 and "error" in response.json()
+            assert DigestStore(Path(tmp) / "store").missing_ranges("2024-01-01", "2024-01-05") == [("2024-01-01", "2024-01-05")]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+ALL_TESTS = [
+    test_cassette_record_replay, 
+    test_retrieve_documents_replay, 
+    test_filter_actions_parallel, 
+    test_filter_patterns_performance, 
+    test_query_page, 
+    test_search_index, 
+    test_rin_cache, 
+    test_digest_store, 
+    test_merge_results, 
+    test_service, 
+    ]
 
 
 if __name__ == "__main__":
     
-#    for func in ALL_TESTS:
-#        func()
+    for func in ALL_TESTS:
+        func()
     
     print("Tests complete.")